@@ -1,5 +1,286 @@
-import pandas
-from sympy.logic.boolalg import to_dnf, to_cnf, simplify_logic
+from __future__ import annotations
+
+import functools
+import re
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy
+    import pandas
+    import sympy
+
+_MAX_JIT_MASK_BITS = 62
+_MIN_JIT_ROWS = 100_000
+_GATE_RE = re.compile(r' ([&|]) ')
+_GATE_MAP = {'&': ' AND ', '|': ' OR '}
+
+
+def _fill_clause_masks(codes, valid, offsets, masks):
+    """Fills the clause bitmask of each row of the CoFFE table.
+
+    Each (column, state code) pair is assigned the bit offsets[column] + code, and
+    the mask of a row is the union of the bits of its non ignored states. This 
+    function is compiled with numba when it is available.
+
+    Parameters
+    ----------
+    codes : numpy.ndarray
+        Integer codes of the states, one row per CoFFE table row.
+    valid : numpy.ndarray
+        Boolean array of the same shape than codes, False for ignored states.
+    offsets : numpy.ndarray
+        First bit of each column, so that every state of every column has its own
+        bit.
+    masks : numpy.ndarray
+        Output int64 array where the mask of each row is stored.
+    """
+
+    for r in range(codes.shape[0]):
+        mask = 0
+        for c in range(codes.shape[1]):
+            if valid[r, c]:
+                mask |= 1 << (offsets[c] + codes[r, c])
+        masks[r] = mask
+
+
+@functools.cache
+def _get_jit_fill_clause_masks():
+    """Returns _fill_clause_masks compiled with numba, or None if numba is not
+    installed. The compilation is cached on disk, so it is only paid once.
+    """
+
+    try:
+        import numba
+    except ImportError:
+        return None
+    return numba.njit(cache=True)(_fill_clause_masks)
+
+
+def _get_clause_masks(codes, valid, offsets, num_bits) -> list[int]:
+    """Obtains the clause bitmask of each row of the CoFFE table.
+
+    The numba compiled loop is used for large tables when numba is installed and 
+    the masks fit in an int64. Otherwise the masks are built as Python integers,
+    which for small tables is faster than loading the compiled function.
+
+    Parameters
+    ----------
+    codes : numpy.ndarray
+        Integer codes of the states, one row per CoFFE table row.
+    valid : numpy.ndarray
+        Boolean array of the same shape than codes, False for ignored states.
+    offsets : numpy.ndarray
+        First bit of each column, so that every state of every column has its own
+        bit.
+    num_bits : int
+        Total number of bits used by the states of all the columns.
+
+    Returns
+    -------
+    list[int]
+        The clause bitmask of each row.
+    """
+
+    import numpy as np
+
+    if codes.shape[0] >= _MIN_JIT_ROWS and num_bits <= _MAX_JIT_MASK_BITS:
+        jit_fill_clause_masks = _get_jit_fill_clause_masks()
+    else:
+        jit_fill_clause_masks = None
+
+    if jit_fill_clause_masks is not None:
+        masks = np.zeros(codes.shape[0], dtype=np.int64)
+        jit_fill_clause_masks(codes, valid, offsets, masks)
+        return masks.tolist()
+
+    masks = []
+    column_offsets = offsets.tolist()
+    for row_codes, row_valid in zip(codes.tolist(), valid.tolist()):
+        mask = 0
+        for c, code in enumerate(row_codes):
+            if row_valid[c]:
+                mask |= 1 << (column_offsets[c] + code)
+        masks.append(mask)
+    return masks
+
+
+def _is_monotone_dnf(expr: sympy.logic.boolalg.Boolean) -> bool:
+    """Checks if a boolean expression is a sum of products without negations, so
+    it can be minimized with bitmasks.
+
+    Parameters
+    ----------
+    expr : sympy.logic.boolalg.Boolean
+        Boolean expression to check.
+
+    Returns
+    -------
+    bool
+        True if the expression can be minimized by _get_bitmask_forms.
+    """
+
+    import sympy
+    from sympy.logic.boolalg import Not, is_dnf
+
+    return (
+        (expr.is_Symbol or isinstance(expr, (sympy.And, sympy.Or)))
+        and not expr.atoms(Not)
+        and is_dnf(expr)
+        )
+
+
+def _simplify_boolean_expression(expr: sympy.logic.boolalg.Boolean) -> str:
+    """Simplifies a boolean expression.
+
+    This function evaluates three different methods from Sympy (sympy.logic.boolalg -
+    to_dnf, to_cnf, and simplify), and gets the reduction that has the minimum number
+    of operations (the simplest one), regardless of the length of the variable names. 
+
+    CoFFE rows never contain negations, so the expression is usually monotone. In
+    that case simplify_logic is skipped: it always returns either the simplified
+    DNF or CNF form, which are already evaluated. When the expression is a sum of
+    products both forms are computed with bitmasks, without SymPy.
+
+    Parameters
+    ----------
+    expr : sympy.logic.boolalg.Boolean
+        General boolean expression obtained from the CoFFE table for a certain
+        result (Failure Condition), built directly as a SymPy expression so no
+        string parsing is needed.
+
+    Returns
+    -------
+    str
+        Simplified boolean expression obtained from the general one.
+    """
+
+    import sympy
+    from sympy.logic.boolalg import Not, to_dnf, to_cnf, simplify_logic
+
+    if expr.atoms(Not):
+        expr_list = [
+            to_dnf(expr, simplify=True, force=True),
+            simplify_logic(expr, force=True),
+            to_cnf(expr, simplify=True, force=True)
+            ]
+    elif _is_monotone_dnf(expr):
+        expr_list = _get_bitmask_forms(expr)
+    else:
+        expr_list = [
+            to_dnf(expr, simplify=True, force=True),
+            to_cnf(expr, simplify=True, force=True)
+            ]
+
+    return str(min(expr_list, key=sympy.count_ops))
+
+
+def _get_mask_bits(mask: int):
+    """Yields each of the bits set in a bitmask, from the lowest to the highest.
+
+    Parameters
+    ----------
+    mask : int
+        Bitmask to iterate.
+    """
+
+    while mask:
+        bit = mask & -mask
+        yield bit
+        mask ^= bit
+
+
+def _get_minimal_masks(masks) -> list[int]:
+    """Removes the bitmasks that are a strict superset of another one (absorption, 
+    A | (A & B) = A).
+
+    Parameters
+    ----------
+    masks : Iterable[int]
+        Bitmasks without duplicates, each one representing a set of variables.
+
+    Returns
+    -------
+    list[int]
+        The bitmasks not absorbed by any other bitmask.
+    """
+
+    masks = list(masks)
+    return [
+        mask for mask in masks
+        if not any((other & mask) == other and other != mask for other in masks)
+        ]
+
+
+def _get_minimal_transversals(masks: list[int]) -> list[int]:
+    """Obtains the minimal sets of variables intersecting every given bitmask.
+
+    For a monotone sum of products, the minimal transversals of its clauses are
+    the clauses of its minimal CNF form. They are built clause by clause, keeping
+    only the minimal ones after each step.
+
+    Parameters
+    ----------
+    masks : list[int]
+        Bitmasks of the clauses of a monotone sum of products.
+
+    Returns
+    -------
+    list[int]
+        Bitmasks of the minimal transversals.
+    """
+
+    transversals = [0]
+    for clause_mask in masks:
+        next_transversals = set()
+        for mask in transversals:
+            if mask & clause_mask:
+                next_transversals.add(mask)
+            else:
+                next_transversals.update(mask | bit for bit in _get_mask_bits(clause_mask))
+        transversals = _get_minimal_masks(next_transversals)
+    return transversals
+
+
+def _get_bitmask_forms(expr: sympy.logic.boolalg.Boolean) -> list[sympy.logic.boolalg.Boolean]:
+    """Obtains the minimized DNF and CNF forms of a monotone sum of products 
+    representing each clause as an integer bitmask.
+
+    For a monotone expression the minimal DNF is the set of clauses not absorbed
+    by any other clause. CoffeInstance already removes the absorbed clauses when 
+    building the expression, so the clauses are taken as they are. The minimal CNF
+    is made of the minimal transversals of those clauses.
+
+    Parameters
+    ----------
+    expr : sympy.logic.boolalg.Boolean
+        Monotone sum of products built from SymPy symbols, ANDs and ORs, without
+        absorbed clauses.
+
+    Returns
+    -------
+    list[sympy.logic.boolalg.Boolean]
+        The minimized DNF and CNF forms, in that order, as SymPy expressions.
+    """
+
+    import sympy
+
+    symbols = sorted(expr.free_symbols, key=str)
+    var_index = {symbol: i for i, symbol in enumerate(symbols)}
+
+    def get_symbols(mask):
+        return [symbols[bit.bit_length() - 1] for bit in _get_mask_bits(mask)]
+
+    clauses = expr.args if isinstance(expr, sympy.Or) else (expr,)
+    dnf_masks = []
+    for clause in clauses:
+        literals = clause.args if isinstance(clause, sympy.And) else (clause,)
+        dnf_masks.append(sum(1 << var_index[literal] for literal in literals))
+    cnf_masks = _get_minimal_transversals(dnf_masks)
+
+    dnf = sympy.Or(*[sympy.And(*get_symbols(mask)) for mask in dnf_masks])
+    cnf = sympy.And(*[sympy.Or(*get_symbols(mask)) for mask in cnf_masks])
+
+    return [dnf, cnf]
 
 
 class CoffeInstance:
@@ -22,6 +303,10 @@ class CoffeInstance:
     custom_headers : list, optional
         Variable names for the boolean expression, if not defined A, B, ... are used. 
         The value by default is [].
+    max_workers : int, optional
+        Maximum number of processes used to simplify the expressions of the CoFFE 
+        results. If None or 1 they are simplified sequentially. The value by default
+        is None.
     
     Methods
     -------
@@ -44,7 +329,8 @@ class CoffeInstance:
             self, 
             ignored_states: list[str] = [], 
             ignored_results: list[str] = [], 
-            custom_headers: list[str] = []
+            custom_headers: list[str] = [],
+            max_workers: int | None = None
             ) -> None:
         """
         Parameters
@@ -57,11 +343,18 @@ class CoffeInstance:
         custom_headers : list[str] optional
             Variable names for the boolean expression, if not defined A, B, ... are used.
             The value by default is [].
+        max_workers : int | None, optional
+            Maximum number of processes used to simplify the expressions of the CoFFE 
+            results. If None or 1 they are simplified sequentially. When
+            greater than 1, the calling script must guard its entry point with 
+            `if __name__ == '__main__':`, as required by multiprocessing on platforms 
+            starting processes with spawn (Windows, macOS). The value by default is None.
         """
 
         self.ignored_states = ignored_states
         self.ignored_results = ignored_results
         self.custom_headers = custom_headers
+        self.max_workers = max_workers
         
         if self.custom_headers == []:
             self._default_headers = [chr(letter) for letter in range(65, 91)]
@@ -70,11 +363,7 @@ class CoffeInstance:
             self.apply_custom_headers = True
 
         self.coffe_summary = {}
-
-        self.or_gate = ' | '
-        self.and_gate = ' & '
-        self.start_row = '('
-        self.end_row = ')'
+        self._simplify_cache = {}
     
     @property
     def ignored_states(self) -> list[str]:
@@ -83,6 +372,7 @@ class CoffeInstance:
     @ignored_states.setter
     def ignored_states(self, ignored_states: list[str]):
         self._ignored_states = ignored_states
+        self._ignored_states_set = frozenset(ignored_states)
 
     @property
     def ignored_results(self) -> list[str]:
@@ -91,6 +381,7 @@ class CoffeInstance:
     @ignored_results.setter
     def ignored_results(self, ignored_results: list[str]) -> None:
         self._ignored_results = ignored_results
+        self._ignored_results_set = frozenset(ignored_results)
 
     @property
     def custom_headers(self) -> list[str]:
@@ -100,6 +391,14 @@ class CoffeInstance:
     def custom_headers(self, custom_headers: list) -> None:
         self._custom_headers = custom_headers
 
+    @property
+    def max_workers(self) -> int | None:
+        return self._max_workers
+    
+    @max_workers.setter
+    def max_workers(self, max_workers: int | None) -> None:
+        self._max_workers = max_workers
+
     def get_simplified_expression_from_csv(self, csv_path:str, csv_delimiter:str = ';') -> dict[str, str]:
         """Reduces each of the results of the CoFFE table (from a csv) to the 
         most simplified boolean expression leading to that result.
@@ -141,6 +440,11 @@ class CoffeInstance:
     def __get_dataframe_from_csv(self, csv_path: str, csv_delimiter: str) -> pandas.DataFrame:
         """From a csv file a pandas' DataFrame is generated.
 
+        Every cell is read as a string with the C engine and without NA detection,
+        since states and results are always consumed as strings. Whitespaces are 
+        removed from the states once per column, and each state column is converted
+        to a categorical column since it only contains a few different states.
+
         Parameters
         ----------
         csv_path : str
@@ -156,7 +460,24 @@ class CoffeInstance:
             Structure that contains two-dimensional data that represents the CoFFE table.
         """
 
-        return pandas.read_csv(csv_path, delimiter = csv_delimiter)
+        import pandas
+
+        # Only the state columns are read as strings, the type of the results is 
+        # still inferred so that they can be compared with self.ignored_results.
+        columns = pandas.read_csv(csv_path, delimiter = csv_delimiter, nrows = 0).columns
+        df = pandas.read_csv(
+            csv_path, 
+            delimiter = csv_delimiter, 
+            engine = 'c', 
+            dtype = {column: str for column in columns[:-1]}, 
+            keep_default_na = False, 
+            na_filter = False
+            )
+        df.iloc[:, :-1] = df.iloc[:, :-1].apply(lambda column: column.str.replace(' ', '', regex=False))
+        for column in df.columns[:-1]:
+            df[column] = df[column].astype('category')
+
+        return df
 
     def __get_info_from_dataframe(self, df: pandas.DataFrame) -> None:
         """Sets a dictionary to store relevant CoFFE results as boolean expressions,
@@ -168,43 +489,70 @@ class CoffeInstance:
             Structure that contains two-dimensional data that represents the CoFFE table.
         """
 
-        self.__set_coffe_summary_dict(df)
-        self.__get_boolean_expressions(df)
+        rows_by_result = self.__scan(df)
+        self.__get_boolean_expressions(df, rows_by_result)
 
-    def __set_coffe_summary_dict(self, df: pandas.DataFrame) -> None:
-        """Calulates the list of results contained in the CoFFE table, filters 
-        which are relevant for the analysis and sets a dictionary to store their 
-        boolean expressions.
+    def __scan(self, df: pandas.DataFrame) -> dict[str, numpy.ndarray]:
+        """Calulates the list of results contained in the CoFFE table and the rows
+        related to each of them in a single pass, filters which are relevant for the
+        analysis and sets a dictionary to store their boolean expressions.
 
         The dict has the following form: 
             self.coffe_summary[key] = {
-                'expr': '',
+                'expr': None,
                 'simplified_expr': ''
                 }
 
+        'expr' is later set to the general boolean expression as a SymPy object, 
+        built at once from the clauses of the result, and 'simplified_expr' to the 
+        simplified expression as a string.
+
         Parameters
         ----------
         df : pandas.DataFrame
             Structure that contains two-dimensional data that represents the CoFFE table.
+
+        Returns
+        -------
+        dict[str, numpy.ndarray]
+            A dictionary where each key is a relevant CoFFE result (Failure Condition)
+            and their value is the array with the positions of its rows.
         """
 
-        results = df.iloc[:, -1].unique().tolist()
-        for result in results:
-            if result not in self.ignored_results:
-                self.coffe_summary[result] = {'expr': '', 'simplified_expr': ''}
+        import numpy as np
+
+        rows_by_result = {}
+        for result, rows in df.groupby(df.columns[-1], sort=False).indices.items():
+            # Numeric results are returned as Python scalars, as the rest of them.
+            if isinstance(result, np.generic):
+                result = result.item()
+            if result not in self._ignored_results_set:
+                self.coffe_summary[result] = {'expr': None, 'simplified_expr': ''}
+                rows_by_result[result] = rows
 
-    def __get_boolean_expressions(self, df: pandas.DataFrame) -> None:
+        return rows_by_result
+
+    def __get_boolean_expressions(self, df: pandas.DataFrame, rows_by_result: dict[str, numpy.ndarray]) -> None:
         """The general boolean expression is obtained for each relevant CoFFE 
         result (Failure Condition). Then it is simplified and both are stored in 
         self.coffe_summary_dict.
 
         The general boolean expression is obtained as a sum of each row related to
-        the CoFFE result under consideration. 
+        the CoFFE result under consideration. Each row is an AND of the symbols
+        of its non ignored states, which are found comparing the integer codes of
+        the categorical state columns. Rows are first encoded as bitmasks, with one
+        bit per (column, state) pair. Symbols are created once per bit and reused
+        between rows. Duplicated rows are merged and rows absorbed by a smaller one
+        (A | (A & B) = A) are dropped before simplifying. Expressions made of a single
+        row, or of rows with a single state each, are already as simple as possible
+        and are not simplified. 
 
         Parameters
         ----------
         df : pandas.DataFrame
             Structure that contains two-dimensional data that represents the CoFFE table.
+        rows_by_result : dict[str, numpy.ndarray]
+            Positions of the rows related to each relevant CoFFE result.
 
         Raises
         ------
@@ -212,8 +560,10 @@ class CoffeInstance:
             If the custom_headers attribute is incoherent with the size of the DataFrame.
         """
 
+        import numpy as np
+        import sympy
+
         num_columns = len(df.columns)
-        results_column = num_columns - 1
 
         if self.apply_custom_headers:
             if len(self.custom_headers) == num_columns - 1:
@@ -224,54 +574,89 @@ class CoffeInstance:
         else:
             headers = self._default_headers
         
-        for _, row in df.iterrows():
-            result = row.iloc[results_column]
-            if result not in self.ignored_results:
-                row_expression = ''
-                for i in range(num_columns - 1):
-                    state = row.iloc[i].replace(" ", "")
-                    if state not in self.ignored_states:
-                        if row_expression == '':
-                            row_expression = ''.join([self.start_row, f'{headers[i]}_{state}'])
-                        else:
-                            row_expression = ''.join([row_expression, self.and_gate, f'{headers[i]}_{state}'])
-                row_expression = ''.join([row_expression, self.end_row, self.or_gate])
-                self.coffe_summary[result]['expr'] = ''.join([self.coffe_summary[result]['expr'], row_expression])
-        
+        state_columns = [df[column] for column in df.columns[:-1]]
+        categories = [column.cat.categories for column in state_columns]
+        codes = np.column_stack([column.cat.codes.to_numpy() for column in state_columns])
+        valid = np.column_stack([
+            ~column_categories.isin(self._ignored_states_set)[codes[:, i]]
+            for i, column_categories in enumerate(categories)
+            ])
+        bit_states = [
+            (i, state)
+            for i, column_categories in enumerate(categories)
+            for state in column_categories
+            ]
+        offsets = np.cumsum([0] + [len(column_categories) for column_categories in categories[:-1]])
+        masks = _get_clause_masks(codes, valid, offsets, len(bit_states))
+        symbols = {}
+
+        def get_clause(mask):
+            clause = []
+            while mask:
+                bit = mask & -mask
+                if bit not in symbols:
+                    i, state = bit_states[bit.bit_length() - 1]
+                    symbols[bit] = sympy.Symbol(f'{headers[i]}_{state}')
+                clause.append(symbols[bit])
+                mask ^= bit
+            return sympy.And(*clause)
+
+        pending_keys = []
         for key in self.coffe_summary:
-            self.coffe_summary[key]['expr'] = self.coffe_summary[key]['expr'][:-3]
-            self.coffe_summary[key]['simplified_expr'] = self.__simplify_boolean_expression(self.coffe_summary[key]['expr'])
+            minimal_masks = _get_minimal_masks({masks[row] for row in rows_by_result[key]})
+            self.coffe_summary[key]['expr'] = sympy.Or(*[get_clause(mask) for mask in minimal_masks])
+            if len(minimal_masks) == 1 or all(mask & (mask - 1) == 0 for mask in minimal_masks):
+                self.coffe_summary[key]['simplified_expr'] = str(self.coffe_summary[key]['expr'])
+            else:
+                pending_keys.append(key)
+
+        simplified_exprs = self.__simplify_boolean_expressions(
+            [self.coffe_summary[key]['expr'] for key in pending_keys]
+            )
+        for key, simplified_expr in zip(pending_keys, simplified_exprs):
+            self.coffe_summary[key]['simplified_expr'] = simplified_expr
 
-    def __simplify_boolean_expression(self, expr):
-        """Simplifies a boolean expression.
+    def __simplify_boolean_expressions(self, exprs: list[sympy.logic.boolalg.Boolean]) -> list[str]:
+        """Simplifies the boolean expressions of several CoFFE results.
 
-        This function evaluates three different methods from Sympy (sympy.logic.boolalg -
-        to_dnf, to_cnf, and simplify), and gets the reduction that has the minimum length
-        (the simplest one). 
+        Each expression is simplified independently, so when max_workers is greater
+        than 1 and at least two of them are pending they are distributed among up to
+        max_workers processes. Results are memoized by the canonical representation 
+        of the expression, so identical expressions are only simplified once per 
+        instance.
 
         Parameters
         ----------
-        expr : str
-            General boolean expression obtained from the CoFFE table for a certain
+        exprs : list[sympy.logic.boolalg.Boolean]
+            General boolean expressions obtained from the CoFFE table, one per 
             result (Failure Condition).
 
         Returns
         -------
-        str
-            Simplified boolean expression obtained from the general one.
+        list[str]
+            Simplified boolean expressions, in the same order than exprs.
         """
 
-        expr_list = [
-            str(to_dnf(expr, simplify=True, force=True)),
-            str(simplify_logic(expr, force=True)),
-            str(to_cnf(expr, simplify=True, force=True))
-            ]
-        
-        expr_len = [len(boolean_expr) for boolean_expr in expr_list]
-        min_expr_index = expr_len.index(min(expr_len))
+        import sympy
+
+        keys = [sympy.srepr(expr) for expr in exprs]
+        pending = {
+            key: expr for key, expr in zip(keys, exprs) 
+            if key not in self._simplify_cache
+            }
+
+        if self.max_workers is None or self.max_workers < 2 or len(pending) < 2:
+            simplified_exprs = map(_simplify_boolean_expression, pending.values())
+            self._simplify_cache.update(zip(pending, simplified_exprs))
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                simplified_exprs = executor.map(_simplify_boolean_expression, pending.values())
+                self._simplify_cache.update(zip(pending, simplified_exprs))
+
+        return [self._simplify_cache[key] for key in keys]
 
-        return expr_list[min_expr_index]
-            
     def __get_result_dict(self) -> dict[str, str]:
         """Simplifies the complete dictionary with the complete CoFFE analysis data to
         another dictionary to show the results.
@@ -285,8 +670,9 @@ class CoffeInstance:
 
         result_dict = {}
         for key in self.coffe_summary:
-            result_dict[key] = str(
-                self.coffe_summary[key]['simplified_expr']
-                ).replace(self.and_gate, " AND ").replace(self.or_gate, " OR ")
+            result_dict[key] = _GATE_RE.sub(
+                lambda gate: _GATE_MAP[gate.group(1)], 
+                str(self.coffe_summary[key]['simplified_expr'])
+                )
 
         return result_dict
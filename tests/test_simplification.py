@@ -0,0 +1,188 @@
+import os
+import sys
+import pytest
+
+pkg_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if pkg_path not in sys.path:
+    sys.path.append(pkg_path)
+
+import numpy as np
+import sympy
+from sympy.logic.boolalg import And, Not, Or, to_cnf, to_dnf
+
+import src.coffeanalyzer.coffeanalyzer as coffeanalyzer
+from src.coffeanalyzer.coffeanalyzer import CoffeInstance
+
+A, B, C, D, E = sympy.symbols('A B C D E')
+
+# The first line of the csv is read as the header of the table.
+TWO_RESULTS_CSV = '\n'.join([
+    'A;B;C;D;Result',
+    'F;F;O;O;X',
+    'O;O;F;F;X',
+    'F;F;F;O;X',
+    'F;O;F;O;Y',
+    'O;F;O;F;Y',
+    'O;O;O;O;No Loss',
+    ])
+
+def write_csv(tmp_path, content):
+    path_csv = tmp_path / 'table.csv'
+    path_csv.write_text(content + '\n')
+    return str(path_csv)
+
+def get_two_results(tmp_path, **kwargs):
+    path_csv = write_csv(tmp_path, TWO_RESULTS_CSV)
+    coffe = CoffeInstance(ignored_states=['O'], ignored_results=['No Loss'], **kwargs)
+    return coffe.get_simplified_expression_from_csv(path_csv)
+
+EXPECTED_TWO_RESULTS = {
+    'X': '(A_F AND B_F) OR (C_F AND D_F)',
+    'Y': '(A_F AND C_F) OR (B_F AND D_F)'
+    }
+
+def test_minimal_masks():
+    assert sorted(coffeanalyzer._get_minimal_masks([0b0011, 0b0111, 0b1000, 0b1001])) == [0b0011, 0b1000]
+
+def test_minimal_transversals():
+    transversals = coffeanalyzer._get_minimal_transversals([0b0011, 0b1100])
+
+    assert sorted(transversals) == [0b0101, 0b0110, 0b1001, 0b1010]
+
+def test_bitmask_forms():
+    dnf, cnf = coffeanalyzer._get_bitmask_forms(Or(And(A, B), And(C, D)))
+
+    assert dnf == Or(And(A, B), And(C, D))
+    assert cnf == And(Or(A, C), Or(A, D), Or(B, C), Or(B, D))
+
+def test_bitmask_forms_common_factor():
+    dnf, cnf = coffeanalyzer._get_bitmask_forms(Or(And(A, B), And(A, C), And(A, D)))
+
+    assert dnf == Or(And(A, B), And(A, C), And(A, D))
+    assert cnf == And(A, Or(B, C, D))
+
+@pytest.mark.parametrize('expr', [
+    A,
+    And(A, B),
+    Or(A, B, C),
+    Or(And(A, B), And(C, D)),
+    Or(A, And(B, C), And(B, D)),
+    Or(And(A, B), And(A, C, D), And(B, C, E)),
+    Or(And(A, B, C), And(A, B, D), And(A, C, D), And(B, C, D, E)),
+    ])
+def test_bitmask_forms_match_sympy(expr):
+    dnf, cnf = coffeanalyzer._get_bitmask_forms(expr)
+
+    assert dnf == to_dnf(expr, simplify=True, force=True)
+    assert cnf == to_cnf(expr, simplify=True, force=True)
+
+def test_non_monotone_expression():
+    expr = Or(And(A, Not(B)), And(A, B), And(C, D))
+
+    assert coffeanalyzer._simplify_boolean_expression(expr) == str(Or(A, And(C, D)))
+
+def test_bitmask_path(tmp_path):
+    assert get_two_results(tmp_path) == EXPECTED_TWO_RESULTS
+
+def test_sympy_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(coffeanalyzer, '_is_monotone_dnf', lambda expr: False)
+
+    assert get_two_results(tmp_path) == EXPECTED_TWO_RESULTS
+
+def test_process_pool(tmp_path):
+    assert get_two_results(tmp_path, max_workers=2) == EXPECTED_TWO_RESULTS
+
+def get_clause_mask_arrays():
+    codes = np.array([[0, 1, 2], [2, 0, 1], [1, 1, 0]], dtype=np.int8)
+    valid = np.array([[True, True, False], [True, False, True], [False, False, False]])
+    return codes, valid
+
+# Every column has 3 states, so state code c of column i is the bit 3 * i + c.
+CLAUSE_MASK_OFFSETS = [0, 3, 6]
+EXPECTED_CLAUSE_MASKS = [0b000010001, 0b010000100, 0]
+
+def test_python_clause_masks(monkeypatch):
+    monkeypatch.setattr(coffeanalyzer, '_MIN_JIT_ROWS', 0)
+    monkeypatch.setattr(coffeanalyzer, '_get_jit_fill_clause_masks', lambda: None)
+    codes, valid = get_clause_mask_arrays()
+    offsets = np.array(CLAUSE_MASK_OFFSETS)
+
+    assert coffeanalyzer._get_clause_masks(codes, valid, offsets, 9) == EXPECTED_CLAUSE_MASKS
+
+def test_jit_clause_masks(monkeypatch):
+    numba = pytest.importorskip('numba')
+    # Compiled without the disk cache, since the tests import the module as 
+    # src.coffeanalyzer and the cache must match the installed module name.
+    jit_fill_clause_masks = numba.njit(coffeanalyzer._fill_clause_masks)
+    monkeypatch.setattr(coffeanalyzer, '_MIN_JIT_ROWS', 0)
+    monkeypatch.setattr(coffeanalyzer, '_get_jit_fill_clause_masks', lambda: jit_fill_clause_masks)
+    codes, valid = get_clause_mask_arrays()
+    offsets = np.array(CLAUSE_MASK_OFFSETS)
+
+    assert coffeanalyzer._get_clause_masks(codes, valid, offsets, 9) == EXPECTED_CLAUSE_MASKS
+
+def test_ignored_state_before_last_category(tmp_path):
+    # 'D' sorts between 'F' and 'O', so 'O' keeps the highest state code.
+    path_csv = write_csv(tmp_path, '\n'.join([
+        'A;B;Result',
+        'O;D;X',
+        'D;O;Y',
+        'F;D;Z',
+        ]))
+    coffe = CoffeInstance(ignored_states=['D'])
+
+    script_results = coffe.get_simplified_expression_from_csv(path_csv)
+
+    assert script_results == {'X': 'A_O', 'Y': 'B_O', 'Z': 'A_F'}
+
+THREE_STATES_RESULTS = {
+    'D': {
+        'X': 'A_O OR C_O',
+        'Y': 'C_F AND (B_F OR B_O)',
+        'Z': 'A_F AND (B_F OR C_O)',
+        },
+    'F': {
+        'X': '(A_O AND B_O) OR (A_D AND B_D AND C_O) OR (A_O AND B_D AND C_D)',
+        'Y': 'A_D',
+        'Z': 'C_D OR (B_D AND C_O)',
+        },
+    'O': {
+        'X': 'C_F OR (A_D AND B_D) OR (B_D AND C_D)',
+        'Y': 'A_D AND C_F',
+        'Z': '(A_F AND B_D) OR (A_F AND B_F AND C_D)',
+        },
+    }
+
+@pytest.mark.parametrize('ignored_state', ['D', 'F', 'O'])
+def test_three_states_file(ignored_state):
+    path_csv = 'tests/test_files/three_states.csv'
+    coffe = CoffeInstance(ignored_states=[ignored_state])
+
+    script_results = coffe.get_simplified_expression_from_csv(path_csv)
+
+    assert script_results == THREE_STATES_RESULTS[ignored_state]
+
+def test_numeric_results_file():
+    path_csv = 'tests/test_files/numeric_results.csv'
+    coffe = CoffeInstance(ignored_states=['O'], ignored_results=[0])
+
+    script_results = coffe.get_simplified_expression_from_csv(path_csv)
+
+    assert script_results == {1: 'A_F AND B_F'}
+    assert all(type(result) is int for result in script_results)
+
+def test_simplest_form_by_operation_count(tmp_path):
+    # Both forms have 4 gates, so the sum of products is kept even though the
+    # product of sums is the shorter string.
+    path_csv = write_csv(tmp_path, '\n'.join([
+        'A;B;C;D;Result',
+        'F;F;F;O;X',
+        'F;F;O;F;X',
+        'F;O;F;F;X',
+        ]))
+    coffe = CoffeInstance(ignored_states=['O'])
+
+    script_results = coffe.get_simplified_expression_from_csv(path_csv)
+    expected_result = "(A_F AND B_F AND C_F) OR (A_F AND B_F AND D_F) OR (A_F AND C_F AND D_F)"
+
+    assert script_results['X'] == expected_result